@@ -1,11 +1,31 @@
 import streamlit as st
-from collections import deque
+import numpy as np
 import pandas as pd
+from numba import njit
 import csv
+import functools
+import operator
 import os
 
+# Columns of orders.csv, in file order; the first six are the order's own inputs and
+# must be present, the metric columns after them default to 0 when missing
+CSV_COLUMNS = ["Order ID", "Customer Name", "Order Type", "Preparation Time", "Station", "Priority",
+               "Arrival Time", "Completion Time", "Wait Time", "Turnaround Time"]
+CSV_DTYPES = {"Order ID": str, "Customer Name": str, "Order Type": str, "Station": str,
+              "Preparation Time": "int32", "Priority": "int8", "Arrival Time": "int32",
+              "Completion Time": "int32", "Wait Time": "int32", "Turnaround Time": "int32"}
+REQUIRED_COLUMNS = CSV_COLUMNS[:6]
+
+# Kitchen stations, mapped to the small ints used for per-station arrays
+STATION_IDX = {"Grill": 0, "Fryers": 1, "Oven": 2, "Salads": 3}
+# Lower-cased station names, for matching hand-edited values like " grill"
+STATION_NAMES = {name.lower(): name for name in STATION_IDX}
+
 # Define the Order class with priority levels
 class Order:
+    __slots__ = ("order_id", "customer_name", "order_type", "preparation_time", "station", "priority",
+                 "completion_time", "arrival_time")
+
     def __init__(self, order_id, customer_name, order_type, preparation_time, station, priority=0):
         self.order_id = order_id
         self.customer_name = customer_name
@@ -13,117 +33,250 @@ class Order:
         self.preparation_time = preparation_time  # time in minutes
         self.station = station  # kitchen station (e.g., grill, fryers)
         self.priority = priority  # Priority: 0 = low, 1 = medium, 2 = high
-        self.wait_time = 0
-        self.turnaround_time = 0
         self.completion_time = 0
         self.arrival_time = 0
 
+    # Wait and turnaround times are derived on read, so schedulers only set
+    # arrival_time and completion_time
+    @property
+    def wait_time(self):
+        return self.arrival_time  # Assuming all orders arrive at the same time
+
+    @property
+    def turnaround_time(self):
+        return self.completion_time - self.arrival_time
+
     def __str__(self):
         return f"Order {self.order_id} for {self.customer_name} ({self.order_type}, {self.station}, Priority: {self.priority}): {self.preparation_time} min left"
 
 
+# Pulls one order's fields as a tuple in CSV column order (attrgetter runs in C)
+get_order_row = operator.attrgetter("order_id", "customer_name", "order_type", "preparation_time", "station",
+                                    "priority", "arrival_time", "completion_time", "wait_time", "turnaround_time")
+
+
+# Run orders back to back in the given order; completion times are a prefix sum
+def run_in_sequence(orders):
+    prep = np.fromiter((o.preparation_time for o in orders), dtype=np.int64, count=len(orders))
+    completion = np.cumsum(prep)
+    arrival = completion - prep
+    for order, arrival_time, completion_time in zip(orders, arrival.tolist(), completion.tolist()):
+        order.arrival_time = arrival_time
+        order.completion_time = completion_time
+    return orders
+
+
 # FCFS (First Come First Serve) Scheduler
 def fcfs_scheduler(orders):
-    completed_orders = []
-    current_time = 0
-    for order in orders:
-        order.arrival_time = current_time
-        order.completion_time = current_time + order.preparation_time
-        order.wait_time = order.arrival_time  # Assuming all orders arrive at the same time
-        order.turnaround_time = order.completion_time - order.arrival_time
-        current_time += order.preparation_time
-        completed_orders.append(order)
-    return completed_orders
+    return run_in_sequence(list(orders))
 
 
 # Priority Scheduling (higher priority = processed first)
-def priority_scheduler(orders):
-    completed_orders = []
-    current_time = 0
-    sorted_orders = sorted(orders, key=lambda o: o.priority, reverse=True)
-    for order in sorted_orders:
-        order.arrival_time = current_time
-        order.completion_time = current_time + order.preparation_time
-        order.wait_time = order.arrival_time  # Assuming all orders arrive at the same time
-        order.turnaround_time = order.completion_time - order.arrival_time
-        current_time += order.preparation_time
-        completed_orders.append(order)
-    return completed_orders
+def priority_scheduler(orders, order_index=None):
+    # order_index lets callers pass a stable high-to-low argsort they already computed
+    if order_index is None:
+        priorities = np.fromiter((o.priority for o in orders), dtype=np.int8, count=len(orders))
+        order_index = np.argsort(-priorities, kind="stable")
+    return run_in_sequence([orders[i] for i in order_index.tolist()])
+
+
+# Round Robin kernel: event-accurate queue simulation over plain arrays.
+# The queue is a ring buffer of order indices; remaining time lives alongside it,
+# so the orders themselves are only touched once each, after they complete.
+# Kernels are built per time slice so q is a compile-time constant to LLVM.
+# numba's on-disk cache cannot reload closures, hence no cache=True here.
+@functools.lru_cache(maxsize=8)
+def build_rr_kernel(q):
+    @njit
+    def rr_kernel(prep, station_id, num_stations):
+        n = prep.shape[0]
+        remaining = prep.copy()
+        queue = np.arange(n)
+        head = 0
+        size = n
+        finished = np.empty(n, dtype=np.int64)
+        arrival = np.zeros(n, dtype=np.int64)
+        completion = np.zeros(n, dtype=np.int64)
+        station_loads = np.zeros(num_stations, dtype=np.int64)
+        current_time = 0
+        done = 0
+
+        while size > 0:
+            i = queue[head]
+            head = (head + 1) % n
+            size -= 1
+            station_loads[station_id[i]] += 1
+
+            if remaining[i] > q:
+                remaining[i] -= q
+                current_time += q
+                queue[(head + size) % n] = i
+                size += 1
+            else:
+                arrival[i] = current_time
+                current_time += remaining[i]
+                completion[i] = current_time
+                finished[done] = i
+                done += 1
+
+        return finished, arrival, completion, station_loads
+
+    return rr_kernel
+
+
+# Streamlit re-executes this file in a fresh module on every rerun, which empties
+# build_rr_kernel's lru_cache, so the app goes through st.cache_resource, which
+# outlives reruns; the default (time_slice=5, no peak hour) kernel is compiled once
+# per server process. Without a Streamlit runtime st.cache_resource does not cache,
+# and the lru_cache above keeps plain callers from recompiling on every call.
+@st.cache_resource(max_entries=8)
+def make_rr_kernel(q):
+    return build_rr_kernel(q)
 
 
 # Enhanced Round Robin Scheduling function
 def enhanced_round_robin_scheduling(orders, time_slice, peak_hour=False):
-    order_queue = deque(orders)
     completed_orders = []
-    current_time = 0
     station_loads = {}
 
-    # Initialize station load counts
-    for order in orders:
-        if order.station not in station_loads:
-            station_loads[order.station] = 0
-
     # Peak hour handling
     if peak_hour:
         time_slice *= 2
 
-    while order_queue:
-        current_order = order_queue.popleft()
-        station_loads[current_order.station] += 1
-        current_order.arrival_time = current_time
+    prep = np.array([order.preparation_time for order in orders], dtype=np.int32)
+    station_id = np.array([STATION_IDX[order.station] for order in orders], dtype=np.int32)
+    rr_kernel = make_rr_kernel(int(time_slice))
+    finished, arrival, completion, loads = rr_kernel(prep, station_id, len(STATION_IDX))
 
-        if current_order.preparation_time > time_slice:
-            current_order.preparation_time -= time_slice
-            current_time += time_slice
-            order_queue.append(current_order)
-        else:
-            current_time += current_order.preparation_time
-            current_order.completion_time = current_time
-            current_order.wait_time = current_order.arrival_time  # Assuming all orders arrive at the same time
-            current_order.turnaround_time = current_order.completion_time - current_order.arrival_time
-            completed_orders.append(current_order)
+    for i in finished.tolist():
+        order = orders[i]
+        order.arrival_time = int(arrival[i])
+        order.completion_time = int(completion[i])
+        completed_orders.append(order)
+
+    # Report only the stations that had orders
+    for station, sid in STATION_IDX.items():
+        if loads[sid]:
+            station_loads[station] = int(loads[sid])
 
     return completed_orders, station_loads
 
 
 # Function to save orders to a CSV file
 def save_orders_to_csv(orders):
-    with open("orders.csv", mode="w", newline="") as file:
-        writer = csv.writer(file)
-        writer.writerow(["Order ID", "Customer Name", "Order Type", "Preparation Time", "Station", "Priority", 
-                         "Arrival Time", "Completion Time", "Wait Time", "Turnaround Time"])
-        for order in orders:
-            writer.writerow([order.order_id, order.customer_name, order.order_type, order.preparation_time, 
-                             order.station, order.priority, order.arrival_time, order.completion_time, 
-                             order.wait_time, order.turnaround_time])
+    with open("orders.csv", mode="w", newline="", buffering=1 << 20) as file:
+        writer = csv.writer(file, lineterminator="\n")
+        writer.writerow(CSV_COLUMNS)
+        writer.writerows(map(get_order_row, orders))
+
+
+# Function to check that a new row can be appended to orders.csv as-is: the file must
+# have the full CSV_COLUMNS header and end with a newline
+def csv_accepts_append():
+    with open("orders.csv", mode="rb") as file:
+        header = next(csv.reader([file.readline().decode(errors="replace")]), [])
+        file.seek(-1, os.SEEK_END)
+        return header == CSV_COLUMNS and file.read(1) == b"\n"
 
 
-# Function to load orders from CSV file with error handling
+# Function to add a single order to the CSV file, appending it without rewriting the
+# file when possible. Returns False if the existing file could not be loaded.
+def append_order_to_csv(order):
+    new_file = not os.path.exists("orders.csv") or os.path.getsize("orders.csv") == 0
+    if not new_file and not csv_accepts_append():
+        # Older or hand-edited file: load it and rewrite it whole in the current format
+        orders, _, error = load_orders_from_csv()
+        if error:
+            return False
+        orders.append(order)
+        save_orders_to_csv(orders)
+        return True
+    with open("orders.csv", mode="a", newline="") as file:
+        writer = csv.writer(file, lineterminator="\n")
+        if new_file:
+            writer.writerow(CSV_COLUMNS)
+        writer.writerow(get_order_row(order))
+    return True
+
+
+# Function to load orders from CSV file with error handling.
+# Returns the orders, their priorities as an int8 array in the same order, and the
+# load error message (None when the file loaded cleanly or does not exist).
 def load_orders_from_csv():
     orders = []
+    priorities = np.empty(0, dtype=np.int8)
+    error = None
     if os.path.exists("orders.csv"):
         try:
-            with open("orders.csv", mode="r") as file:
-                reader = csv.DictReader(file)
-                for row in reader:
-                    orders.append(Order(
-                        order_id=row.get("Order ID"),
-                        customer_name=row.get("Customer Name"),
-                        order_type=row.get("Order Type"),
-                        preparation_time=int(row.get("Preparation Time", 0)),
-                        station=row.get("Station"),
-                        priority=int(row.get("Priority", 0))
-                    ))
-                    # Assign loaded metrics
-                    orders[-1].arrival_time = int(row.get("Arrival Time", 0))
-                    orders[-1].completion_time = int(row.get("Completion Time", 0))
-                    orders[-1].wait_time = int(row.get("Wait Time", 0))
-                    orders[-1].turnaround_time = int(row.get("Turnaround Time", 0))
+            # Declaring the column types up front skips pandas' type-inference pass.
+            # memory_map hands the parser the file's pages directly instead of copying
+            # them through a read buffer; the OS page cache keeps repeat loads hot.
+            df = pd.read_csv("orders.csv", dtype=CSV_DTYPES, keep_default_na=False, engine="c",
+                             memory_map=True)
+            missing = [column for column in REQUIRED_COLUMNS if column not in df.columns]
+            if missing:
+                raise ValueError(f"orders.csv is missing columns: {', '.join(missing)}")
+            df = df.reindex(columns=CSV_COLUMNS, fill_value=0)
+            # Normalise station names; unknown ones are kept as written and reported at scheduling
+            stations = df["Station"].str.strip()
+            df["Station"] = stations.str.lower().map(STATION_NAMES).fillna(stations)
+            for (order_id, customer_name, order_type, preparation_time, station, priority,
+                 arrival_time, completion_time, _, _) in df.itertuples(index=False, name=None):
+                order = Order(order_id, customer_name, order_type, preparation_time, station, priority)
+                # Assign loaded metrics
+                order.arrival_time = arrival_time
+                order.completion_time = completion_time
+                orders.append(order)
+            priorities = df["Priority"].to_numpy(dtype=np.int8)
         except Exception as e:
-            st.error(f"Error loading orders: {e}")
+            error = f"Error loading orders: {e}"
+            st.error(error)
+            # Keep priorities in step with whatever orders did load
+            priorities = np.fromiter((o.priority for o in orders), dtype=np.int8, count=len(orders))
     else:
         st.warning("No orders found. Please add some orders first.")
-    return orders
+    return orders, priorities, error
+
+
+# Function to build a display DataFrame with typed columns from a list of orders
+def orders_to_dataframe(orders):
+    columns = list(zip(*map(get_order_row, orders))) if orders else [()] * len(CSV_COLUMNS)
+    return pd.DataFrame({
+        name: np.array(values, dtype=object if CSV_DTYPES[name] is str else CSV_DTYPES[name])
+        for name, values in zip(CSV_COLUMNS, columns)
+    })
+
+
+# Memoized orders_to_dataframe for the orders loaded from orders.csv. The cache key is
+# just the file's stamp from orders_file_stamp(); _orders is not hashed by st.cache_data.
+@st.cache_data(max_entries=4)
+def cached_orders_dataframe(file_stamp, _orders):
+    return orders_to_dataframe(_orders)
+
+
+# Function to identify the current contents of orders.csv cheaply: nanosecond mtime plus
+# size, so on filesystems with coarse mtimes a same-tick rewrite that changes the file's
+# length still shows up as a change.
+def orders_file_stamp():
+    if not os.path.exists("orders.csv"):
+        return None
+    stat = os.stat("orders.csv")
+    return stat.st_mtime_ns, stat.st_size
+
+
+# Function to reuse the orders parsed on a previous rerun until orders.csv changes
+def get_cached_orders():
+    file_stamp = orders_file_stamp()
+    if "orders" not in st.session_state or st.session_state.get("orders_file_stamp") != file_stamp:
+        (st.session_state.orders, st.session_state.priorities,
+         st.session_state.orders_error) = load_orders_from_csv()
+        st.session_state.orders_file_stamp = file_stamp
+    elif st.session_state.orders_error:
+        # A failed load stays failed until the file changes; keep saying so
+        st.error(st.session_state.orders_error)
+    elif file_stamp is None:
+        st.warning("No orders found. Please add some orders first.")
+    return st.session_state.orders, st.session_state.priorities, st.session_state.orders_error
 
 
 # Streamlit App
@@ -131,32 +284,27 @@ def streamlit_app():
     st.title("Automated Restaurant Order Scheduling")
 
     # Input form for adding orders
+    # (a form only reruns the script on submit, not on every keystroke)
     st.header("Add New Orders")
-    order_id = st.text_input("Order ID")
-    customer_name = st.text_input("Customer Name")
-    order_type = st.selectbox("Order Type", ["dine-in", "takeaway", "online"])
-    preparation_time = st.number_input("Preparation Time (minutes)", min_value=1)
-    station = st.selectbox("Kitchen Station", ["Grill", "Fryers", "Oven", "Salads"])
-    priority = st.selectbox("Order Priority", [0, 1, 2])  # 0 = low, 1 = medium, 2 = high
-
-    if st.button("Add Order"):
+    with st.form("add_order"):
+        order_id = st.text_input("Order ID")
+        customer_name = st.text_input("Customer Name")
+        order_type = st.selectbox("Order Type", ["dine-in", "takeaway", "online"])
+        preparation_time = st.number_input("Preparation Time (minutes)", min_value=1)
+        station = st.selectbox("Kitchen Station", list(STATION_IDX))
+        priority = st.selectbox("Order Priority", [0, 1, 2])  # 0 = low, 1 = medium, 2 = high
+        submitted = st.form_submit_button("Add Order")
+
+    if submitted:
         new_order = Order(order_id, customer_name, order_type, preparation_time, station, priority)
-        orders = load_orders_from_csv()
-        orders.append(new_order)
-        save_orders_to_csv(orders)
-        st.success(f"Order {order_id} added successfully!")
+        if append_order_to_csv(new_order):
+            st.success(f"Order {order_id} added successfully!")
 
     # Display current orders
     st.header("Current Orders")
-    orders = load_orders_from_csv()
+    orders, priorities, load_error = get_cached_orders()
     if orders:
-        df_orders = pd.DataFrame([(o.order_id, o.customer_name, o.order_type, o.preparation_time, 
-                                   o.station, o.priority, o.arrival_time, o.completion_time,
-                                   o.wait_time, o.turnaround_time)
-                                  for o in orders],
-                                 columns=["Order ID", "Customer Name", "Order Type", "Preparation Time", 
-                                          "Station", "Priority", "Arrival Time", "Completion Time", 
-                                          "Wait Time", "Turnaround Time"])
+        df_orders = cached_orders_dataframe(st.session_state.orders_file_stamp, orders)
         st.write(df_orders)
 
     # Automatic Scheduling Decision
@@ -165,32 +313,36 @@ def streamlit_app():
     peak_hour = st.checkbox("Is it peak hour?", value=False)
 
     if st.button("Start Scheduling"):
+        # Scheduling rewrites orders.csv, so never run it over a file we failed to read
+        if load_error:
+            st.error("Not scheduling: fix orders.csv so it loads, then try again.")
+            return
+
         completed_orders = []
 
         # Determine the scheduling method based on order characteristics
-        if any(order.priority == 2 for order in orders):  # Check for high-priority orders
+        if (priorities == 2).any():  # Check for high-priority orders
             st.write("Using Priority Scheduling due to high-priority orders.")
-            completed_orders = priority_scheduler(orders)
-        elif all(order.priority <= 1 for order in orders):  # All orders normal or low priority
+            completed_orders = priority_scheduler(orders, np.argsort(-priorities, kind="stable"))
+        elif (priorities <= 1).all():  # All orders normal or low priority
             st.write("Using FCFS Scheduling as all orders have normal priority.")
             completed_orders = fcfs_scheduler(orders)
         else:
+            unknown_stations = sorted({o.station for o in orders} - STATION_IDX.keys())
+            if unknown_stations:
+                st.error(f"Unknown kitchen station(s) in orders.csv: {', '.join(unknown_stations)}")
+                return
             st.write("Using Round Robin Scheduling to balance the workload.")
             completed_orders, station_loads = enhanced_round_robin_scheduling(orders, time_slice, peak_hour)
             st.subheader("Station Load Balancing Results")
             st.write(station_loads)
 
-        save_orders_to_csv(completed_orders)
+        # Persist the completed orders straight from the DataFrame we display
+        df_completed = orders_to_dataframe(completed_orders)
+        df_completed.to_csv("orders.csv", index=False, lineterminator="\n")
 
         # Show completed orders
         st.subheader("Completed Orders")
-        df_completed = pd.DataFrame([(o.order_id, o.customer_name, o.order_type, o.preparation_time, 
-                                       o.station, o.priority, o.arrival_time, o.completion_time,
-                                       o.wait_time, o.turnaround_time)
-                                     for o in completed_orders],
-                                    columns=["Order ID", "Customer Name", "Order Type", "Preparation Time", 
-                                             "Station", "Priority", "Arrival Time", "Completion Time", 
-                                             "Wait Time", "Turnaround Time"])
         st.write(df_completed)
 
 # Run the Streamlit app